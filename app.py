@@ -1,13 +1,111 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
 import json
+import csv
+import io
 import html
 import re
+import hashlib
+import gzip
+import functools
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 BACKEND_URL = "http://localhost:8000"
 
+# HTML templates for result cards; only the values are filled in per result
+METRIC_ROW_TEMPLATE = "<div style='display: flex; flex-wrap: wrap; gap: 1rem;'>{cards}</div>"
+# (no blank lines inside: markdown would end the HTML block there)
+METRIC_CARD_TEMPLATE = """<div style='flex: 1 1 0; 
+                min-width: 180px; 
+                background: {gradient}; 
+                padding: 1.5rem; 
+                border-radius: 12px; 
+                text-align: center;
+                color: white;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+                word-wrap: break-word;'>
+        <div style='font-size: 0.9rem; opacity: 0.9; margin-bottom: 0.5rem;'>{label}</div>
+        <div style='font-size: {value_size}; font-weight: 700;'>{value}</div>{footer}
+    </div>"""
+METRIC_FOOTER_TEMPLATE = "<div style='font-size: 0.8rem; opacity: 0.9; margin-top: 0.5rem;'>{text}</div>"
+RESULT_BANNER_HTML = """<div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                padding: 1.5rem; 
+                border-radius: 12px; 
+                margin-bottom: 2rem;
+                text-align: center;
+                color: white;
+                font-size: 1.2rem;
+                font-weight: 600;'>
+        ✅ Analysis Complete!
+    </div>"""
+TIMESTAMP_TEMPLATE = "<div style='text-align: center; color: #666; margin-bottom: 1.5rem;'>📅 Analyzed: {timestamp}</div>"
+SIMILAR_FAILURE_TEMPLATE = """<div style='background: #f8f9fa; 
+                padding: 1rem; 
+                border-radius: 8px; 
+                margin: 0.5rem 0;
+                border-left: 4px solid #667eea;'>
+        <div style='font-weight: 600; color: #333; margin-bottom: 0.5rem;'>
+            {index}. {category}
+        </div>
+        <div style='font-size: 0.85rem; color: #666;'>
+            Similarity: <strong>{similarity:.3f}</strong> | 
+            Timestamp: {timestamp}
+        </div>
+    </div>"""
+
+STATS_CATEGORY_TEMPLATE = """<div style='background: rgba(255,255,255,0.2); 
+                padding: 0.5rem 1rem; 
+                border-radius: 6px; 
+                margin: 0.25rem 0;
+                color: white;
+                display: flex;
+                justify-content: space-between;'>
+        <span>{category}</span>
+        <strong>{count}</strong>
+    </div>"""
+
+# Connect timeout (seconds) for backend calls, so a down backend fails fast
+CONNECT_TIMEOUT = 3
+
+# Pasted logs are cut to their last characters to stay under the backend's 100KB limit
+MAX_TEXT_CHARS = 100000
+
+# (connect, read) timeout for the sidebar health probe
+HEALTH_TIMEOUT = (1, 2)
+
+# Uploads and request bodies at least this large are gzipped before being sent to the backend
+GZIP_MIN_BYTES = 64 * 1024
+
+# Color lookups for severity / match type badges
+DEFAULT_GRADIENT = "linear-gradient(135deg, #95a5a6 0%, #7f8c8d 100%)"
+SEVERITY_GRADIENTS = {
+    "High": "linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%)",
+    "Medium": "linear-gradient(135deg, #feca57 0%, #ff9ff3 100%)",
+    "Low": "linear-gradient(135deg, #48dbfb 0%, #0abde3 100%)"
+}
+MATCH_TYPE_GRADIENTS = {
+    "Exact match": "linear-gradient(135deg, #00b894 0%, #00cec9 100%)",
+    "Vector match": "linear-gradient(135deg, #feca57 0%, #ff9ff3 100%)",
+    "LLM new analysis": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
+}
+CATEGORY_GRADIENT = "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
+DEFAULT_COLOR = "#95a5a6"
+SEVERITY_COLORS = {
+    "High": "#ff6b6b",
+    "Medium": "#feca57",
+    "Low": "#48dbfb"
+}
+
 st.set_page_config(
     page_title="AI CI/CD Debugger", 
     page_icon="🛠️", 
@@ -16,7 +114,7 @@ st.set_page_config(
 )
 
 # Custom CSS for modern, appealing design
-st.markdown("""
+APP_CSS = """
     <style>
     /* Main styling */
     .main {
@@ -218,72 +316,296 @@ st.markdown("""
         display: none;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+# st.html injects the stylesheet as-is instead of running it through the markdown parser
+st.html(APP_CSS)
 
 # Initialize session state
+# History is stored column-wise so rows append cheaply and the columns go
+# straight to st.dataframe and the csv writer; each column keeps only the
+# latest rows
+HISTORY_COLUMNS = ("Category", "Severity", "Match Type", "Similarity", "Timestamp")
+HISTORY_MAX_ROWS = 100
+HISTORY_PAGE_SIZE = 25
 if "history" not in st.session_state:
-    st.session_state["history"] = []
+    st.session_state["history"] = {column: deque(maxlen=HISTORY_MAX_ROWS) for column in HISTORY_COLUMNS}
+if "history_version" not in st.session_state:
+    st.session_state["history_version"] = 0
 if "stats" not in st.session_state:
     st.session_state["stats"] = None
 
-def clean_html_tags(text):
-    """Remove HTML tags while preserving markdown formatting"""
-    if not text:
-        return ""
-    
-    text = str(text)
-    
+def _parse_json(resp):
+    """Parse a backend response body, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+@st.cache_resource
+def _http():
+    """Shared HTTP session so backend connections are kept alive across reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        # Retry connection errors with exponential backoff, for any method since
+        # the request never reached the backend. 502/504 are retried only for
+        # idempotent requests: a POST may already have paid for an LLM call.
+        # 4xx are user errors, 500 is a failed analysis, 503 means the API key
+        # is missing, and read timeouts already waited out the full read
+        # budget, so none of those are retried.
+        max_retries=Retry(
+            total=3,
+            read=0,
+            backoff_factor=1,
+            status_forcelist=[502, 504],
+            raise_on_status=False
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # The sidebar health probe fails fast instead of retrying; the longest
+    # matching prefix wins, so this only applies to /health
+    session.mount(f"{BACKEND_URL}/health", HTTPAdapter(max_retries=0))
+    return session
+
+@st.cache_data(ttl=10, show_spinner=False)
+def _get_health():
+    """Backend /health payload, or None if the backend is unreachable.
+
+    Both outcomes are reused across reruns for a few seconds, so an outage
+    doesn't stall every interaction on the probe.
+    """
+    try:
+        resp = _http().get(f"{BACKEND_URL}/health", timeout=HEALTH_TIMEOUT)
+        return _parse_json(resp)
+    except (requests.exceptions.RequestException, ValueError):
+        return None
+
+@st.cache_resource
+def _executor():
+    """Worker pool for backend calls that shouldn't block the script thread"""
+    return ThreadPoolExecutor(max_workers=4)
+
+def _upload_meta(uploaded_file):
+    """Return (filename, content_type) for an upload, filling in sensible defaults"""
+    # Ensure we have a valid filename
+    filename = uploaded_file.name or "logfile.log"
+    # Determine content type - default to text/plain for .log and .txt files
+    content_type = uploaded_file.type
+    if not content_type:
+        if filename.endswith('.log') or filename.endswith('.txt'):
+            content_type = "text/plain"
+        else:
+            content_type = "application/octet-stream"
+    return filename, content_type
+
+def _upload_part(log_file, filename, content_type):
+    """Build the multipart (filename, body, content_type) tuple for an uploaded log.
+    
+    requests reads the file and builds the whole multipart body in memory, so
+    this doesn't stream. That's fine: the backend caps logs at 100,000
+    characters.
+    """
+    if log_file.size >= GZIP_MIN_BYTES:
+        # CI logs compress very well; level 1 keeps the CPU cost far below the transfer saved
+        return (f"{filename}.gz", gzip.compress(log_file.getbuffer(), compresslevel=1), "application/gzip")
+    log_file.seek(0)
+    return (filename, log_file, content_type)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _content_hash(file_id, _uploaded_file):
+    """SHA-256 of an upload's bytes, computed once per uploaded file.
+    
+    The buffer is hashed in place (no copy), and resubmitting the same
+    upload reuses the digest instead of reading the file again.
+    """
+    return hashlib.sha256(_uploaded_file.getbuffer()).hexdigest()
+
+@st.cache_data(ttl=24 * 3600, max_entries=128, show_spinner=False)
+def _analyze_log_cached(content_hash, _log_file, _filename, _content_type):
+    """Analyze an uploaded log, memoized on its content hash so re-uploads skip the backend.
+    
+    The file object is passed through unhashed; larger logs are gzipped
+    before upload. Non-200 responses raise HTTPError so they are never cached.
+    """
+    resp = _http().post(
+        f"{BACKEND_URL}/analyze-log", 
+        files={"file": _upload_part(_log_file, _filename, _content_type)}, 
+        timeout=(CONNECT_TIMEOUT, 120),
+        headers={"Accept": "application/json"}
+    )
+    resp.raise_for_status()
+    return _parse_json(resp)
+
+def _analyze_logs_batch(log_files):
+    """Analyze several uploaded logs in one request; results come back in upload order"""
+    files = [("files", _upload_part(log_file, *_upload_meta(log_file))) for log_file in log_files]
+    resp = _http().post(
+        f"{BACKEND_URL}/analyze-logs", 
+        files=files, 
+        # Files are analyzed one after another, so allow the read budget per file
+        timeout=(CONNECT_TIMEOUT, 120 * len(log_files)),
+        headers={"Accept": "application/json"}
+    )
+    resp.raise_for_status()
+    return _parse_json(resp)["results"]
+
+def _analyze_text(content):
+    """Analyze pasted log content; large bodies are gzipped before sending"""
+    payload = {"content": content}
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    resp = _http().post(
+        f"{BACKEND_URL}/analyze-text",
+        data=body,
+        timeout=(CONNECT_TIMEOUT, 120),
+        headers=headers
+    )
+    resp.raise_for_status()
+    return _parse_json(resp)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _search(query, limit):
+    """Search past failures, memoized per (query, limit) for a few minutes"""
+    resp = _http().post(
+        f"{BACKEND_URL}/search",
+        json={"query": query, "limit": limit},
+        timeout=(CONNECT_TIMEOUT, 30)
+    )
+    resp.raise_for_status()
+    return _parse_json(resp)
+
+def _history_csv(history):
+    """Serialize the column-wise history to CSV text"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(HISTORY_COLUMNS)
+    writer.writerows(zip(*(history[column] for column in HISTORY_COLUMNS)))
+    return buffer.getvalue()
+
+def _history_csv_for_export():
+    """CSV export of this session's history and its file name, rebuilt only when the history has changed"""
+    version = st.session_state["history_version"]
+    cached = st.session_state.get("history_csv")
+    if cached is None or cached[0] != version:
+        file_name = f"cicd_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        # Stored encoded, so the download button doesn't re-encode it on each rerun
+        csv_bytes = _history_csv(st.session_state["history"]).encode("utf-8")
+        cached = (version, csv_bytes, file_name)
+        st.session_state["history_csv"] = cached
+    return cached[1], cached[2]
+
+def _history_filter_options():
+    """Category and severity filter choices, recomputed only when the history changes"""
+    version = st.session_state["history_version"]
+    cached = st.session_state.get("history_options")
+    if cached is None or cached[0] != version:
+        history = st.session_state["history"]
+        cached = (
+            version,
+            ["All"] + list(dict.fromkeys(history["Category"])),
+            ["All"] + list(dict.fromkeys(history["Severity"]))
+        )
+        st.session_state["history_options"] = cached
+    return cached[1], cached[2]
+
+def _filter_history(history, category, severity):
+    """Rows of the column-wise history matching the selected category and severity"""
+    keep = [
+        (category == "All" or row_category == category)
+        and (severity == "All" or row_severity == severity)
+        for row_category, row_severity in zip(history["Category"], history["Severity"])
+    ]
+    return {
+        column: [value for value, kept in zip(values, keep) if kept]
+        for column, values in history.items()
+    }
+
+def _filtered_history(category, severity):
+    """Filtered view of this session's history, recomputed only when the history or filters change"""
+    key = (st.session_state["history_version"], category, severity)
+    cached = st.session_state.get("history_filtered")
+    if cached is None or cached[0] != key:
+        cached = (key, _filter_history(st.session_state["history"], category, severity))
+        st.session_state["history_filtered"] = cached
+    return cached[1]
+
+# Patterns used by clean_html_tags, compiled once at import. Tags that get
+# the same replacement share one alternation, so each is a single pass.
+_OL_RE = re.compile(r'<ol[^>]*>(.*?)</ol>', re.IGNORECASE | re.DOTALL)
+_UL_RE = re.compile(r'<ul[^>]*>|</ul>', re.IGNORECASE)
+_LI_OPEN_RE = re.compile(r'<li[^>]*>', re.IGNORECASE)
+_LI_CLOSE_RE = re.compile(r'</li>', re.IGNORECASE)
+_P_RE = re.compile(r'<p[^>]*>|</p>', re.IGNORECASE)
+_BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_BOLD_TAG_RE = re.compile(r'<strong[^>]*>|</strong>|<b[^>]*>|</b>', re.IGNORECASE)
+_ITALIC_TAG_RE = re.compile(r'<em[^>]*>|</em>|<i[^>]*>|</i>', re.IGNORECASE)
+_HEADER_OPEN_RE = re.compile(r'<h([1-6])[^>]*>', re.IGNORECASE)
+_HEADER_CLOSE_RE = re.compile(r'</h[1-6]>', re.IGNORECASE)
+_HEADER_PREFIXES = {str(i): '\n' + '#' * i + ' ' for i in range(1, 7)}
+_TAG_RE = re.compile(r'<[^>]+>')
+# Any escaped tag in lowercase entities; escaped div tags in any case
+_ENTITY_TAG_RE = re.compile(r'&lt;[^&]*&gt;|(?i:&lt;[^&]*div[^&]*&gt;)')
+_LEFTOVER_TAG_RE = re.compile(r'</?[a-z]+[^>]*>', re.IGNORECASE)
+_NUMBERED_RE = re.compile(r'(\d+)\.\s+')
+_NUMBERED_LINE_RE = re.compile(r'\n(\d+)\.\s+')
+_BULLET_RE = re.compile(r'(?<!\n)-\s+')
+_BULLET_LINE_RE = re.compile(r'\n-\s+')
+_BOLD_RE = re.compile(r'\*\*([^*]+)\*\*')
+_SPACES_RE = re.compile(r'[ \t]+')
+_LINE_EDGE_SPACES_RE = re.compile(r'[^\S\n]*\n[^\S\n]*')
+_EXTRA_NEWLINES_RE = re.compile(r'\n{3,}')
+
+def _replace_ordered_list(match):
+    """Turn the items of a matched <ol> into a numbered markdown list"""
+    ol_content = match.group(1)
+    # Split by <li> tags and number them
+    items = _LI_OPEN_RE.split(ol_content)
+    items = [item.replace('</li>', '').strip() for item in items if item.strip()]
+    numbered = '\n'.join([f"{i+1}. {item}" for i, item in enumerate(items) if item])
+    return numbered + '\n'
+
+def _html_to_markdown(text):
+    """Convert HTML markup in text to markdown and strip any remaining (escaped) tags"""
     # First, convert common HTML list structures to markdown before removing tags
-    # Handle ordered lists with proper numbering
-    def replace_ordered_list(match):
-        ol_content = match.group(1)
-        # Split by <li> tags and number them
-        items = re.split(r'<li[^>]*>', ol_content, flags=re.IGNORECASE)
-        items = [item.replace('</li>', '').strip() for item in items if item.strip()]
-        numbered = '\n'.join([f"{i+1}. {item}" for i, item in enumerate(items) if item])
-        return numbered + '\n'
-    
     # Convert <ol> lists to numbered markdown
-    text = re.sub(r'<ol[^>]*>(.*?)</ol>', replace_ordered_list, text, flags=re.IGNORECASE | re.DOTALL)
+    text = _OL_RE.sub(_replace_ordered_list, text)
     
     # Convert <ul><li> to markdown bullets
-    text = re.sub(r'<ul[^>]*>', '\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'</ul>', '\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'<li[^>]*>', '- ', text, flags=re.IGNORECASE)
-    text = re.sub(r'</li>', '\n', text, flags=re.IGNORECASE)
+    text = _UL_RE.sub('\n', text)
+    text = _LI_OPEN_RE.sub('- ', text)
+    text = _LI_CLOSE_RE.sub('\n', text)
     
     # Convert <p> tags to double newlines (paragraph breaks)
-    text = re.sub(r'<p[^>]*>', '\n\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'</p>', '\n\n', text, flags=re.IGNORECASE)
+    text = _P_RE.sub('\n\n', text)
     
     # Convert <br> and <br/> to newlines
-    text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
+    text = _BR_RE.sub('\n', text)
     
     # Convert <strong> and <b> to markdown bold
-    text = re.sub(r'<strong[^>]*>', '**', text, flags=re.IGNORECASE)
-    text = re.sub(r'</strong>', '**', text, flags=re.IGNORECASE)
-    text = re.sub(r'<b[^>]*>', '**', text, flags=re.IGNORECASE)
-    text = re.sub(r'</b>', '**', text, flags=re.IGNORECASE)
+    text = _BOLD_TAG_RE.sub('**', text)
     
     # Convert <em> and <i> to markdown italic
-    text = re.sub(r'<em[^>]*>', '*', text, flags=re.IGNORECASE)
-    text = re.sub(r'</em>', '*', text, flags=re.IGNORECASE)
-    text = re.sub(r'<i[^>]*>', '*', text, flags=re.IGNORECASE)
-    text = re.sub(r'</i>', '*', text, flags=re.IGNORECASE)
+    text = _ITALIC_TAG_RE.sub('*', text)
     
     # Convert <h1>-<h6> to markdown headers
-    for i in range(1, 7):
-        text = re.sub(rf'<h{i}[^>]*>', '\n' + '#' * i + ' ', text, flags=re.IGNORECASE)
-        text = re.sub(rf'</h{i}>', '\n', text, flags=re.IGNORECASE)
+    text = _HEADER_OPEN_RE.sub(lambda match: _HEADER_PREFIXES[match.group(1)], text)
+    text = _HEADER_CLOSE_RE.sub('\n', text)
     
     # Now remove all remaining HTML tags (including malformed ones)
-    text = re.sub(r'<[^>]+>', '', text)
+    text = _TAG_RE.sub('', text)
     
-    # Remove escaped HTML entities (multiple passes to catch nested cases)
-    for _ in range(3):  # Multiple passes to handle nested entities
-        text = re.sub(r'&lt;[^&]*&gt;', '', text)  # Remove &lt;...&gt;
-        text = re.sub(r'&lt;/?div[^&]*&gt;', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'&lt;/?[^&]*div[^&]*&gt;', '', text, flags=re.IGNORECASE)
+    # Remove escaped HTML tags (&lt;...&gt;), repeating while removals expose
+    # new ones so nested cases are caught
+    removed = 1
+    while removed:
+        text, removed = _ENTITY_TAG_RE.subn('', text)
     
     # Remove any remaining HTML entity fragments
     text = text.replace('&lt;', '').replace('&gt;', '')
@@ -291,157 +613,156 @@ def clean_html_tags(text):
     text = text.replace('</div', '').replace('<div', '')
     
     # Remove any standalone closing tags
-    text = re.sub(r'</?[a-z]+[^>]*>', '', text, flags=re.IGNORECASE)
+    text = _LEFTOVER_TAG_RE.sub('', text)
+    
+    return text
+
+@functools.lru_cache(maxsize=256)
+def clean_html_tags(text):
+    """Remove HTML tags while preserving markdown formatting.
+
+    Memoized: reruns redisplay the same analysis and fix text, so each
+    string is only cleaned once.
+    """
+    if not text:
+        return ""
+    
+    text = str(text)
+    
+    # Tag and entity handling only matters when the text has '<' or '&';
+    # plain markdown, the common case, skips straight to normalization
+    if '<' in text or '&' in text:
+        text = _html_to_markdown(text)
     
     # Fix numbered lists that might have lost formatting (e.g., "1. " pattern)
     # Ensure numbered lists have proper spacing and are on their own lines
-    text = re.sub(r'(\d+)\.\s+', r'\n\1. ', text)  # Ensure numbered items start on new line
-    text = re.sub(r'\n(\d+)\.\s+', r'\n\1. ', text)  # Normalize numbered list format
+    text = _NUMBERED_RE.sub(r'\n\1. ', text)  # Ensure numbered items start on new line
+    text = _NUMBERED_LINE_RE.sub(r'\n\1. ', text)  # Normalize numbered list format
     
     # Ensure bullet points have proper spacing and are on their own lines
-    text = re.sub(r'(?<!\n)-\s+', '\n- ', text)  # Ensure bullets start on new line (if not already)
-    text = re.sub(r'\n-\s+', '\n- ', text)  # Normalize bullet format
+    text = _BULLET_RE.sub('\n- ', text)  # Ensure bullets start on new line (if not already)
+    text = _BULLET_LINE_RE.sub('\n- ', text)  # Normalize bullet format
     
     # Ensure "**Solution:**" and similar patterns are preserved
     # Make sure bold patterns are properly formatted
-    text = re.sub(r'\*\*([^*]+)\*\*', r'**\1**', text)  # Normalize bold
-    
-    # Clean up excessive whitespace but preserve intentional line breaks
-    # Don't collapse spaces within lines, but normalize line breaks
-    lines = text.split('\n')
-    cleaned_lines = []
-    for line in lines:
-        # Preserve empty lines for paragraph breaks
-        if not line.strip():
-            cleaned_lines.append('')
-        else:
-            # Clean up multiple spaces but preserve single spaces
-            cleaned_line = re.sub(r'[ \t]+', ' ', line.strip())
-            cleaned_lines.append(cleaned_line)
+    text = _BOLD_RE.sub(r'**\1**', text)  # Normalize bold
     
-    text = '\n'.join(cleaned_lines)
+    # Clean up excessive whitespace but preserve intentional line breaks:
+    # collapse runs of spaces/tabs and trim every line, keeping empty lines
+    # as paragraph breaks
+    text = _SPACES_RE.sub(' ', text)
+    text = _LINE_EDGE_SPACES_RE.sub('\n', text)
     # Clean up excessive newlines (more than 2 consecutive)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _EXTRA_NEWLINES_RE.sub('\n\n', text)
     text = text.strip()
     
     return text
 
-def _display_results(data):
-    """Display analysis results with modern, appealing design"""
-    # Success banner
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 1.5rem; 
-                    border-radius: 12px; 
-                    margin-bottom: 2rem;
-                    text-align: center;
-                    color: white;
-                    font-size: 1.2rem;
-                    font-weight: 600;'>
-            ✅ Analysis Complete!
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # Metrics in a nice grid
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        category = data.get('category', 'Unknown')
-        category_escaped = html.escape(str(category))
-        st.markdown(f"""
-            <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                        padding: 1.5rem; 
-                        border-radius: 12px; 
-                        text-align: center;
-                        color: white;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                        word-wrap: break-word;'>
-                <div style='font-size: 0.9rem; opacity: 0.9; margin-bottom: 0.5rem;'>CATEGORY</div>
-                <div style='font-size: 1.5rem; font-weight: 700;'>{category_escaped}</div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        sev = data.get("severity", "Medium")
-        sev_colors = {
-            "High": "linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%)",
-            "Medium": "linear-gradient(135deg, #feca57 0%, #ff9ff3 100%)",
-            "Low": "linear-gradient(135deg, #48dbfb 0%, #0abde3 100%)"
-        }
-        sev_gradient = sev_colors.get(sev, "linear-gradient(135deg, #95a5a6 0%, #7f8c8d 100%)")
-        st.markdown(f"""
-            <div style='background: {sev_gradient}; 
-                        padding: 1.5rem; 
-                        border-radius: 12px; 
-                        text-align: center;
-                        color: white;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                <div style='font-size: 0.9rem; opacity: 0.9; margin-bottom: 0.5rem;'>SEVERITY</div>
-                <div style='font-size: 1.5rem; font-weight: 700;'>{sev}</div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        match_type = data.get('match_type', 'LLM')
-        similarity = data.get('similarity', 'N/A')
-        if similarity != 'N/A' and similarity is not None:
-            similarity_display = f"{float(similarity):.3f}"
+def _show_request_error(e, timeout_message, bad_request_info=None, show_traceback=False):
+    """Report a failed backend call, given the exception it raised"""
+    if isinstance(e, requests.exceptions.HTTPError):
+        resp = e.response
+        if resp.status_code == 400:
+            error_detail = resp.text
+            try:
+                error_json = _parse_json(resp)
+                error_detail = error_json.get("detail", error_detail)
+            except:
+                pass
+            st.error(f"❌ Bad Request (400): {error_detail}")
+            if bad_request_info:
+                st.info(f"💡 {bad_request_info}")
+        elif resp.status_code == 503:
+            st.error("❌ Service Unavailable: OpenAI API key not configured or backend issue.")
         else:
-            similarity_display = "N/A"
-        
-        match_colors = {
-            "Exact match": "linear-gradient(135deg, #00b894 0%, #00cec9 100%)",
-            "Vector match": "linear-gradient(135deg, #feca57 0%, #ff9ff3 100%)",
-            "LLM new analysis": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
-        }
-        match_gradient = match_colors.get(match_type, "linear-gradient(135deg, #95a5a6 0%, #7f8c8d 100%)")
-        st.markdown(f"""
-            <div style='background: {match_gradient}; 
-                        padding: 1.5rem; 
-                        border-radius: 12px; 
-                        text-align: center;
-                        color: white;
-                        box-shadow: 0 4px 6px rgba(0,0,0,0.1);'>
-                <div style='font-size: 0.9rem; opacity: 0.9; margin-bottom: 0.5rem;'>MATCH TYPE</div>
-                <div style='font-size: 1.1rem; font-weight: 700; word-wrap: break-word;'>{html.escape(str(match_type))}</div>
-                <div style='font-size: 0.8rem; opacity: 0.9; margin-top: 0.5rem;'>Similarity: {html.escape(str(similarity_display))}</div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Timestamp
-    if data.get('timestamp'):
-        st.markdown(f"""
-            <div style='text-align: center; color: #666; margin-bottom: 1.5rem;'>
-                📅 Analyzed: {data.get('timestamp')}
-            </div>
-        """, unsafe_allow_html=True)
+            st.error(f"❌ Backend returned HTTP {resp.status_code}: {resp.text}")
+    elif isinstance(e, requests.exceptions.Timeout):
+        st.error(f"⏱️ Request timed out. {timeout_message}")
+    elif isinstance(e, requests.exceptions.ConnectionError):
+        st.error("❌ Cannot connect to backend. Make sure the backend is running on http://localhost:8000")
+    else:
+        st.error(f"❌ Error: {str(e)}")
+        if show_traceback:
+            import traceback
+            st.code("".join(traceback.format_exception(e)), language='text')
+
+def _parse_similarity(value):
+    """Similarity score as a float, or None when the backend didn't report one"""
+    if value is None or value in ("", "N/A", "None"):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _display_results(data, key):
+    """Display analysis results with modern, appealing design; key keeps widget ids unique per result"""
+    # Read each field once up front
+    category = data.get('category', 'Unknown')
+    sev = data.get("severity", "Medium")
+    match_type = data.get('match_type', 'LLM')
+    similarity = _parse_similarity(data.get('similarity'))
+    timestamp = data.get('timestamp')
+    similar_failures = data.get('similar_failures')
+    analysis_text = data.get("analysis", "No analysis available.")
+    fix_text = data.get("suggested_fix", "No fix suggested.")
+    similarity_display = f"{similarity:.3f}" if similarity is not None else "N/A"
+    
+    cards = (
+        METRIC_CARD_TEMPLATE.format(
+            gradient=CATEGORY_GRADIENT,
+            label="CATEGORY",
+            value_size="1.5rem",
+            value=html.escape(str(category)),
+            footer=""
+        )
+        + METRIC_CARD_TEMPLATE.format(
+            gradient=SEVERITY_GRADIENTS.get(sev, DEFAULT_GRADIENT),
+            label="SEVERITY",
+            value_size="1.5rem",
+            value=html.escape(str(sev)),
+            footer=""
+        )
+        + METRIC_CARD_TEMPLATE.format(
+            gradient=MATCH_TYPE_GRADIENTS.get(match_type, DEFAULT_GRADIENT),
+            label="MATCH TYPE",
+            value_size="1.1rem",
+            value=html.escape(str(match_type)),
+            footer=METRIC_FOOTER_TEMPLATE.format(text=f"Similarity: {similarity_display}")
+        )
+    )
+    # Banner, metric cards and timestamp go out as a single element
+    timestamp_html = ""
+    if timestamp:
+        timestamp_html = TIMESTAMP_TEMPLATE.format(timestamp=html.escape(str(timestamp)))
+    st.markdown(
+        RESULT_BANNER_HTML + METRIC_ROW_TEMPLATE.format(cards=cards) + "<br>" + timestamp_html,
+        unsafe_allow_html=True
+    )
     
     # Similar failures in a nice card
-    if data.get('similar_failures'):
-        with st.expander(f"🔗 View {len(data['similar_failures'])} Similar Failures", expanded=False):
-            for i, similar in enumerate(data['similar_failures'], 1):
-                st.markdown(f"""
-                    <div style='background: #f8f9fa; 
-                                padding: 1rem; 
-                                border-radius: 8px; 
-                                margin: 0.5rem 0;
-                                border-left: 4px solid #667eea;'>
-                        <div style='font-weight: 600; color: #333; margin-bottom: 0.5rem;'>
-                            {i}. {similar.get('category', 'Unknown')}
-                        </div>
-                        <div style='font-size: 0.85rem; color: #666;'>
-                            Similarity: <strong>{similar.get('similarity', 0):.3f}</strong> | 
-                            Timestamp: {similar.get('timestamp', 'Unknown')}
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+    if similar_failures:
+        # A toggle rather than an expander: the cards are only built and sent once opened
+        if st.toggle(f"🔗 View {len(similar_failures)} Similar Failures", key=f"{key}_similar"):
+            # All cards go out in one markdown element
+            similar_html = "".join(
+                SIMILAR_FAILURE_TEMPLATE.format(
+                    index=i,
+                    category=html.escape(str(similar.get('category', 'Unknown'))),
+                    similarity=similar.get('similarity', 0),
+                    timestamp=html.escape(str(similar.get('timestamp', 'Unknown')))
+                )
+                for i, similar in enumerate(similar_failures, 1)
+            )
+            st.markdown(similar_html, unsafe_allow_html=True)
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    # Clean the text using comprehensive HTML tag removal
+    analysis_clean = clean_html_tags(analysis_text)
     
-    # Analysis section with styled container
+    # Analysis header and the opening of its styled container share one element
+    # (spacer included)
     st.markdown("""
+        <br>
         <div style='background: linear-gradient(135deg, #e0f2f1 0%, #b2dfdb 100%); 
                     padding: 1.5rem; 
                     border-radius: 12px; 
@@ -449,15 +770,6 @@ def _display_results(data):
                     margin: 1.5rem 0;'>
             <h3 style='color: #00695c; margin-top: 0;'>📋 Analysis</h3>
         </div>
-    """, unsafe_allow_html=True)
-    
-    analysis_text = data.get("analysis", "No analysis available.")
-    # Clean the text using comprehensive HTML tag removal
-    analysis_clean = clean_html_tags(analysis_text)
-    
-    # Use Streamlit's native markdown with styled container
-    # Render markdown in a styled div - use a single structure to avoid empty divs
-    st.markdown(f"""
         <div style='background: white; 
                     padding: 1.5rem; 
                     border-radius: 8px; 
@@ -470,10 +782,13 @@ def _display_results(data):
     # Close div with a comment to prevent empty div rendering
     st.markdown("<!-- end analysis --></div>", unsafe_allow_html=True)
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    # Clean the text using comprehensive HTML tag removal
+    fix_clean = clean_html_tags(fix_text)
     
-    # Suggested fix section
+    # Suggested fix header and the opening of its styled container share one
+    # element (spacer included)
     st.markdown("""
+        <br>
         <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
                     padding: 1.5rem; 
                     border-radius: 12px; 
@@ -481,15 +796,6 @@ def _display_results(data):
                     margin: 1.5rem 0;'>
             <h3 style='color: #2e7d32; margin-top: 0;'>🔧 Suggested Fix</h3>
         </div>
-    """, unsafe_allow_html=True)
-    
-    fix_text = data.get("suggested_fix", "No fix suggested.")
-    # Clean the text using comprehensive HTML tag removal
-    fix_clean = clean_html_tags(fix_text)
-    
-    # Use Streamlit's native markdown with styled container
-    # Render markdown in a styled div - use a single structure to avoid empty divs
-    st.markdown(f"""
         <div style='background: white; 
                     padding: 1.5rem; 
                     border-radius: 8px; 
@@ -501,61 +807,26 @@ def _display_results(data):
     st.markdown(fix_clean)
     # Close div with a comment to prevent empty div rendering
     st.markdown("<!-- end fix --></div>", unsafe_allow_html=True)
-    
-    # Add to history
-    st.session_state["history"].append({
-        "Category": data.get("category", "Unknown"),
-        "Severity": data.get("severity", "Medium"),
-        "Match Type": data.get("match_type", "LLM"),
-        "Similarity": f"{data.get('similarity', 'N/A')}",
-        "Timestamp": data.get("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    })
 
-# Sidebar for navigation and stats
-with st.sidebar:
-    st.markdown("""
-        <div style='text-align: center; padding: 1rem 0;'>
-            <h1 style='color: white; font-size: 2rem; margin: 0;'>📊 Dashboard</h1>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    # Health check with styled card
-    try:
-        health = requests.get(f"{BACKEND_URL}/health", timeout=5).json()
-        if health.get("status") == "healthy":
-            st.markdown(f"""
-                <div style='background: rgba(255,255,255,0.2); 
-                            padding: 1rem; 
-                            border-radius: 10px; 
-                            margin: 1rem 0;
-                            backdrop-filter: blur(10px);'>
-                    <div style='color: white; font-weight: 600; margin-bottom: 0.5rem;'>✅ Backend Connected</div>
-                    <div style='color: rgba(255,255,255,0.9); font-size: 0.9rem;'>
-                        Total Failures: <strong>{health.get('total_failures', 0)}</strong>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.warning("⚠️ Backend Issues")
-    except:
-        st.markdown("""
-            <div style='background: rgba(255,0,0,0.2); 
-                        padding: 1rem; 
-                        border-radius: 10px; 
-                        margin: 1rem 0;
-                        color: white;'>
-                ❌ Backend Unavailable
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
+def _record_history(data):
+    """Append an analysis result to the session's history"""
+    history = st.session_state["history"]
+    history["Category"].append(data.get("category", "Unknown"))
+    history["Severity"].append(data.get("severity", "Medium"))
+    history["Match Type"].append(data.get("match_type", "LLM"))
+    history["Similarity"].append(_parse_similarity(data.get("similarity")))
+    history["Timestamp"].append(data.get("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    st.session_state["history_version"] += 1
+
+@st.fragment
+def _sidebar_stats():
+    """Sidebar statistics; as a fragment, refreshing them reruns only this block"""
     # Load statistics with styled button
     if st.button("🔄 Refresh Stats", use_container_width=True):
         try:
-            stats_resp = requests.get(f"{BACKEND_URL}/stats", timeout=5)
+            stats_resp = _http().get(f"{BACKEND_URL}/stats", timeout=(CONNECT_TIMEOUT, 5))
             if stats_resp.status_code == 200:
-                st.session_state["stats"] = stats_resp.json()
+                st.session_state["stats"] = _parse_json(stats_resp)
                 st.success("Stats updated!")
         except:
             st.error("Failed to load stats")
@@ -566,20 +837,11 @@ with st.sidebar:
         categories_html = ""
         if stats.get("categories"):
             categories_html = "<div style='color: white; font-weight: 600; margin-top: 1rem;'>Top Categories:</div>"
-            for cat, count in list(stats.get("top_categories", {}).items())[:5]:
-                cat_escaped = html.escape(str(cat))
-                categories_html += f"""
-                    <div style='background: rgba(255,255,255,0.2); 
-                                padding: 0.5rem 1rem; 
-                                border-radius: 6px; 
-                                margin: 0.25rem 0;
-                                color: white;
-                                display: flex;
-                                justify-content: space-between;'>
-                        <span>{cat_escaped}</span>
-                        <strong>{count}</strong>
-                    </div>
-                """
+            # Joined with no blank lines in between, so markdown keeps the whole card one HTML block
+            categories_html += "".join(
+                STATS_CATEGORY_TEMPLATE.format(category=html.escape(str(cat)), count=count)
+                for cat, count in islice(stats.get("top_categories", {}).items(), 5)
+            )
         
         # Use a single markdown call to avoid rendering closing tags as text
         st.markdown(f"""
@@ -601,17 +863,56 @@ with st.sidebar:
                 {categories_html}
             </div>
         """, unsafe_allow_html=True)
+
+# Sidebar for navigation and stats
+with st.sidebar:
+    st.markdown("""
+        <div style='text-align: center; padding: 1rem 0;'>
+            <h1 style='color: white; font-size: 2rem; margin: 0;'>📊 Dashboard</h1>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Health check with styled card
+    health = _get_health()
+    if health is None:
+        st.markdown("""
+            <div style='background: rgba(255,0,0,0.2); 
+                        padding: 1rem; 
+                        border-radius: 10px; 
+                        margin: 1rem 0;
+                        color: white;'>
+                ❌ Backend Unavailable
+            </div>
+        """, unsafe_allow_html=True)
+    elif health.get("status") == "healthy":
+        st.markdown(f"""
+            <div style='background: rgba(255,255,255,0.2); 
+                        padding: 1rem; 
+                        border-radius: 10px; 
+                        margin: 1rem 0;
+                        backdrop-filter: blur(10px);'>
+                <div style='color: white; font-weight: 600; margin-bottom: 0.5rem;'>✅ Backend Connected</div>
+                <div style='color: rgba(255,255,255,0.9); font-size: 0.9rem;'>
+                    Total Failures: <strong>{health.get('total_failures', 0)}</strong>
+                </div>
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.warning("⚠️ Backend Issues")
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    _sidebar_stats()
     
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Export history
-    if st.session_state["history"]:
-        df = pd.DataFrame(st.session_state["history"])
-        csv = df.to_csv(index=False)
+    if st.session_state["history"]["Category"]:
+        csv_bytes, file_name = _history_csv_for_export()
         st.download_button(
             label="📥 Export History (CSV)",
-            data=csv,
-            file_name=f"cicd_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            data=csv_bytes,
+            file_name=file_name,
             mime="text/csv",
             use_container_width=True
         )
@@ -648,7 +949,68 @@ st.markdown("""
 # Tabs for different input methods
 tab1, tab2, tab3 = st.tabs(["📄 Upload File", "📝 Paste Text", "🔍 Search Failures"])
 
-with tab1:
+# The poll fragments are only called while their job is pending. run_every
+# keeps a timer going until the next full-app run, which the finished job
+# triggers so the history panel and sidebar export pick up the new rows.
+@st.fragment(run_every=1)
+def _poll_upload_job():
+    """Show the pending upload, and store its results or error once it finishes"""
+    analyze_job = st.session_state.get("analyze_job")
+    if analyze_job is None:
+        return
+    future = analyze_job["future"]
+    if not future.done():
+        with st.status("🔍 Analyzing log file... This may take a moment."):
+            for filename in analyze_job["filenames"]:
+                st.write(f"📄 {filename}")
+        return
+    
+    del st.session_state["analyze_job"]
+    try:
+        if analyze_job.get("batch"):
+            upload_results = list(zip(analyze_job["filenames"], future.result()))
+        else:
+            upload_results = [(None, future.result())]
+        for _, result in upload_results:
+            if not result.get("error"):
+                _record_history(result)
+    except Exception as e:
+        st.session_state["upload_error"] = (e, analyze_job)
+    else:
+        st.session_state["upload_results"] = upload_results
+    # Outside the try: st.rerun() raises an Exception subclass
+    st.rerun()
+
+@st.fragment(run_every=1)
+def _poll_text_job():
+    """Show the pending text analysis, and store its result or error once it finishes"""
+    text_job = st.session_state.get("text_job")
+    if text_job is None:
+        return
+    future = text_job["future"]
+    if not future.done():
+        with st.status("🔍 Analyzing log content... This may take a moment."):
+            if text_job["sent"] < text_job["total"]:
+                st.caption(f"Sending the last {text_job['sent']:,} of {text_job['total']:,} characters")
+        return
+    
+    del st.session_state["text_job"]
+    try:
+        data = future.result()
+        _record_history(data)
+    except Exception as e:
+        st.session_state["text_error"] = e
+    else:
+        st.session_state["text_results"] = {
+            "data": data,
+            "sent": text_job["sent"],
+            "total": text_job["total"]
+        }
+    st.rerun()
+
+@st.fragment
+def _upload_tab():
+    """Upload tab; as a fragment, its widgets and polling rerun only this tab"""
     st.markdown("""
         <div style='background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); 
                     padding: 2rem; 
@@ -660,86 +1022,115 @@ with tab1:
         </div>
     """, unsafe_allow_html=True)
     
-    uploaded_file = st.file_uploader(
-        "Choose a log file", 
-        type=["txt", "log"], 
-        help="Upload a log file to analyze",
-        label_visibility="collapsed"
-    )
+    # The uploader lives in a form so picking a file doesn't trigger a rerun;
+    # the script only reruns when the analyze button submits it
+    with st.form("analyze_log_form", border=False):
+        uploaded_files = st.file_uploader(
+            "Choose log files", 
+            type=["txt", "log"], 
+            accept_multiple_files=True,
+            key="log_files",
+            help="Upload one or more log files to analyze",
+            label_visibility="collapsed"
+        )
+        submitted = st.form_submit_button("🔍 Analyze Log", type="primary", use_container_width=True)
     
-    if uploaded_file is not None:
+    if uploaded_files:
+        file_names = ", ".join(html.escape(uploaded_file.name) for uploaded_file in uploaded_files)
         st.markdown(f"""
             <div style='background: #e8f5e9; 
                         padding: 1rem; 
                         border-radius: 8px; 
                         border-left: 4px solid #4caf50;
                         margin: 1rem 0;'>
-                <strong>📄 {uploaded_file.name}</strong> ready to analyze
+                <strong>📄 {file_names}</strong> ready to analyze
             </div>
         """, unsafe_allow_html=True)
         
-        if st.button("🔍 Analyze Log", type="primary", use_container_width=True):
+        if submitted and st.session_state.get("analyze_job") is not None:
+            # The pending job's worker may still be reading these UploadedFiles,
+            # so they mustn't be rewound or sniffed until it has finished
+            st.warning("⏳ The previous analysis is still running. Please wait for it to finish.")
+        elif submitted:
+            st.session_state.pop("upload_results", None)
+            st.session_state.pop("upload_error", None)
             try:
-                # Prepare file for upload
-                # Reset file pointer to beginning in case it was read before
-                uploaded_file.seek(0)
-                file_content = uploaded_file.read()
-                
-                if not file_content or len(file_content) == 0:
-                    st.error("❌ File appears to be empty. Please select a valid log file.")
-                else:
-                    # Ensure we have a valid filename
-                    filename = uploaded_file.name or "logfile.log"
-                    # Determine content type - default to text/plain for .log and .txt files
-                    content_type = uploaded_file.type
-                    if not content_type:
-                        if filename.endswith('.log') or filename.endswith('.txt'):
-                            content_type = "text/plain"
-                        else:
-                            content_type = "application/octet-stream"
-                    
-                    # Prepare file tuple: (filename, content_bytes, content_type)
-                    # requests library expects bytes for file uploads
-                    files = {"file": (filename, file_content, content_type)}
+                valid_files = []
+                for uploaded_file in uploaded_files:
+                    # Reset file pointer to beginning in case it was read before
+                    uploaded_file.seek(0)
+                    # Sniff the start of the file so empty or binary uploads are rejected
+                    # here instead of costing a backend round-trip
+                    head = uploaded_file.read(4096)
+                    uploaded_file.seek(0)
                     
-                    with st.spinner("🔍 Analyzing log file... This may take a moment."):
-                        try:
-                            resp = requests.post(
-                                f"{BACKEND_URL}/analyze-log", 
-                                files=files, 
-                                timeout=120,
-                                headers={"Accept": "application/json"}
-                            )
-                            if resp.status_code == 200:
-                                data = resp.json()
-                                _display_results(data)
-                            elif resp.status_code == 400:
-                                error_detail = resp.text
-                                try:
-                                    error_json = resp.json()
-                                    error_detail = error_json.get("detail", error_detail)
-                                except:
-                                    pass
-                                st.error(f"❌ Bad Request (400): {error_detail}")
-                                st.info(f"💡 File: {filename}, Size: {len(file_content)} bytes, Type: {content_type}")
-                            elif resp.status_code == 503:
-                                st.error("❌ Service Unavailable: OpenAI API key not configured or backend issue.")
-                            else:
-                                st.error(f"❌ Backend returned HTTP {resp.status_code}: {resp.text}")
-                        except requests.exceptions.Timeout:
-                            st.error("⏱️ Request timed out. The log might be too large or the backend is slow.")
-                        except requests.exceptions.ConnectionError:
-                            st.error("❌ Cannot connect to backend. Make sure the backend is running on http://localhost:8000")
-                        except Exception as e:
-                            st.error(f"❌ Error: {str(e)}")
-                            import traceback
-                            st.code(traceback.format_exc(), language='text')
+                    if not uploaded_file.size or (uploaded_file.size <= len(head) and not head.strip()):
+                        st.error(f"❌ {uploaded_file.name} appears to be empty. Please select a valid log file.")
+                    elif b"\x00" in head:
+                        st.error(f"❌ {uploaded_file.name} appears to be binary. Please select a text log file.")
+                    else:
+                        valid_files.append(uploaded_file)
+                
+                # Run the upload on a worker thread so the script thread stays free
+                if len(valid_files) == 1:
+                    uploaded_file = valid_files[0]
+                    filename, content_type = _upload_meta(uploaded_file)
+                    content_hash = _content_hash(uploaded_file.file_id, uploaded_file)
+                    st.session_state["analyze_job"] = {
+                        "future": _executor().submit(
+                            _analyze_log_cached, content_hash, uploaded_file, filename, content_type
+                        ),
+                        "filenames": [filename],
+                        "size": uploaded_file.size,
+                        "content_type": content_type
+                    }
+                elif valid_files:
+                    # Several files go to the backend together in a single request
+                    st.session_state["analyze_job"] = {
+                        "future": _executor().submit(_analyze_logs_batch, valid_files),
+                        "filenames": [uploaded_file.name for uploaded_file in valid_files],
+                        "batch": True
+                    }
             except Exception as e:
                 st.error(f"❌ Failed to process file: {str(e)}")
                 import traceback
                 st.code(traceback.format_exc(), language='text')
+    elif submitted:
+        st.warning("⚠️ Please choose a log file to analyze.")
+    
+    # Poll the background upload; the nested fragment reruns itself every
+    # second until the backend has answered
+    if st.session_state.get("analyze_job") is not None:
+        _poll_upload_job()
+    
+    upload_error = st.session_state.get("upload_error")
+    if upload_error is not None:
+        e, analyze_job = upload_error
+        bad_request_info = None
+        if not analyze_job.get("batch"):
+            bad_request_info = f"File: {analyze_job['filenames'][0]}, Size: {analyze_job['size']} bytes, Type: {analyze_job['content_type']}"
+        _show_request_error(
+            e,
+            "The log might be too large or the backend is slow.",
+            bad_request_info=bad_request_info,
+            show_traceback=True
+        )
+    
+    # Results of the last upload stay visible until the next analysis
+    for i, (filename, result) in enumerate(st.session_state.get("upload_results", [])):
+        if filename:
+            st.markdown(f"### 📄 {filename}")
+        if result.get("error"):
+            st.error(f"❌ {result['error']}")
+        else:
+            _display_results(result, key=f"upload_{i}")
 
-with tab2:
+with tab1:
+    _upload_tab()
+
+@st.fragment
+def _text_tab():
+    """Paste-text tab; as a fragment, its widgets rerun only this tab"""
     st.markdown("""
         <div style='background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); 
                     padding: 2rem; 
@@ -759,40 +1150,41 @@ with tab2:
     )
     
     if st.button("🔍 Analyze Text", type="primary", use_container_width=True):
+        st.session_state.pop("text_results", None)
+        st.session_state.pop("text_error", None)
         if not text_input or not text_input.strip():
             st.warning("⚠️ Please enter some log content to analyze.")
         else:
-            with st.spinner("🔍 Analyzing log content... This may take a moment."):
-                try:
-                    resp = requests.post(
-                        f"{BACKEND_URL}/analyze-text",
-                        json={"content": text_input},
-                        timeout=120,
-                        headers={"Content-Type": "application/json"}
-                    )
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        _display_results(data)
-                    elif resp.status_code == 400:
-                        error_detail = resp.text
-                        try:
-                            error_json = resp.json()
-                            error_detail = error_json.get("detail", error_detail)
-                        except:
-                            pass
-                        st.error(f"❌ Bad Request (400): {error_detail}")
-                    elif resp.status_code == 503:
-                        st.error("❌ Service Unavailable: OpenAI API key not configured or backend issue.")
-                    else:
-                        st.error(f"❌ Backend returned HTTP {resp.status_code}: {resp.text}")
-                except requests.exceptions.Timeout:
-                    st.error("⏱️ Request timed out. The content might be too large.")
-                except requests.exceptions.ConnectionError:
-                    st.error("❌ Cannot connect to backend. Make sure the backend is running on http://localhost:8000")
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
+            # Errors usually sit at the end of a log, so keep the tail
+            payload = text_input[-MAX_TEXT_CHARS:]
+            # Run the request on a worker thread so the script thread stays free
+            st.session_state["text_job"] = {
+                "future": _executor().submit(_analyze_text, payload),
+                "sent": len(payload),
+                "total": len(text_input)
+            }
+    
+    # Poll the background request; the nested fragment reruns itself every
+    # second until the backend has answered
+    if st.session_state.get("text_job") is not None:
+        _poll_text_job()
+    
+    if st.session_state.get("text_error") is not None:
+        _show_request_error(st.session_state["text_error"], "The content might be too large.")
+    
+    # The last result stays visible until the next analysis
+    text_results = st.session_state.get("text_results")
+    if text_results:
+        if text_results["sent"] < text_results["total"]:
+            st.caption(f"Analyzed the last {text_results['sent']:,} of {text_results['total']:,} characters")
+        _display_results(text_results["data"], key="text")
 
-with tab3:
+with tab2:
+    _text_tab()
+
+@st.fragment
+def _search_tab():
+    """Search tab; as a fragment, its widgets rerun only this tab"""
     st.markdown("""
         <div style='background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%); 
                     padding: 2rem; 
@@ -817,103 +1209,105 @@ with tab3:
         else:
             with st.spinner("🔍 Searching for similar failures..."):
                 try:
-                    resp = requests.post(
-                        f"{BACKEND_URL}/search",
-                        json={"query": search_query, "limit": search_limit},
-                        timeout=30
-                    )
-                    if resp.status_code == 200:
-                        results = resp.json()
-                        if results.get("results"):
-                            st.markdown(f"""
-                                <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
-                                            padding: 1rem; 
-                                            border-radius: 8px; 
-                                            border-left: 4px solid #4caf50;
-                                            margin: 1rem 0;
-                                            text-align: center;'>
-                                    <strong>✅ Found {results.get('count', 0)} similar failures</strong>
-                                </div>
-                            """, unsafe_allow_html=True)
+                    results = _search(search_query, search_limit)
+                    if results.get("results"):
+                        st.markdown(f"""
+                            <div style='background: linear-gradient(135deg, #e8f5e9 0%, #c8e6c9 100%); 
+                                        padding: 1rem; 
+                                        border-radius: 8px; 
+                                        border-left: 4px solid #4caf50;
+                                        margin: 1rem 0;
+                                        text-align: center;'>
+                                <strong>✅ Found {results.get('count', 0)} similar failures</strong>
+                            </div>
+                        """, unsafe_allow_html=True)
+                        
+                        for i, result in enumerate(results["results"], 1):
+                            sev = result.get('severity', 'Unknown')
+                            sev_color = SEVERITY_COLORS.get(sev, DEFAULT_COLOR)
                             
-                            for i, result in enumerate(results["results"], 1):
-                                sev = result.get('severity', 'Unknown')
-                                sev_colors = {
-                                    "High": "#ff6b6b",
-                                    "Medium": "#feca57",
-                                    "Low": "#48dbfb"
-                                }
-                                sev_color = sev_colors.get(sev, "#95a5a6")
-                                
-                                with st.expander(f"Result {i}: {result.get('category', 'Unknown')} (Similarity: {result.get('similarity', 0):.3f})", expanded=False):
-                                    st.markdown(f"""
-                                        <div style='background: #f8f9fa; 
-                                                    padding: 1rem; 
-                                                    border-radius: 8px; 
-                                                    margin: 0.5rem 0;
-                                                    border-left: 4px solid {sev_color};'>
-                                            <div style='margin-bottom: 0.5rem;'>
-                                                <strong>Severity:</strong> 
-                                                <span style='color: {sev_color}; font-weight: 600;'>{sev}</span>
-                                            </div>
-                                            <div style='margin-bottom: 0.5rem;'>
-                                                <strong>Timestamp:</strong> {result.get('timestamp', 'Unknown')}
-                                            </div>
-                                            <div>
-                                                <strong>Preview:</strong>
-                                            </div>
+                            with st.expander(f"Result {i}: {result.get('category', 'Unknown')} (Similarity: {result.get('similarity', 0):.3f})", expanded=False):
+                                st.markdown(f"""
+                                    <div style='background: #f8f9fa; 
+                                                padding: 1rem; 
+                                                border-radius: 8px; 
+                                                margin: 0.5rem 0;
+                                                border-left: 4px solid {sev_color};'>
+                                        <div style='margin-bottom: 0.5rem;'>
+                                            <strong>Severity:</strong> 
+                                            <span style='color: {sev_color}; font-weight: 600;'>{sev}</span>
+                                        </div>
+                                        <div style='margin-bottom: 0.5rem;'>
+                                            <strong>Timestamp:</strong> {result.get('timestamp', 'Unknown')}
+                                        </div>
+                                        <div>
+                                            <strong>Preview:</strong>
                                         </div>
-                                    """, unsafe_allow_html=True)
-                                    st.code(result.get('preview', ''), language='text')
-                        else:
-                            st.info("ℹ️ No similar failures found.")
+                                    </div>
+                                """, unsafe_allow_html=True)
+                                st.code(result.get('preview', ''), language='text')
                     else:
-                        st.error(f"❌ Search failed: {resp.text}")
+                        st.info("ℹ️ No similar failures found.")
                 except Exception as e:
-                    st.error(f"❌ Search error: {e}")
+                    _show_request_error(e, "The backend is slow to respond.")
+
+with tab3:
+    _search_tab()
 
 # History section with modern styling
-if st.session_state["history"]:
-    st.markdown("<br><br>", unsafe_allow_html=True)
-    st.markdown("""
-        <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                    padding: 1.5rem; 
-                    border-radius: 12px; 
-                    margin: 2rem 0 1rem 0;
-                    text-align: center;'>
-            <h2 style='color: white; margin: 0;'>📊 Analysis History</h2>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    df = pd.DataFrame(st.session_state["history"])
-    
-    # Add filters in styled containers
-    col1, col2 = st.columns(2)
-    with col1:
-        categories = ["All"] + list(df["Category"].unique())
-        selected_category = st.selectbox("🔍 Filter by Category", categories)
-    with col2:
-        severities = ["All"] + list(df["Severity"].unique())
-        selected_severity = st.selectbox("🔍 Filter by Severity", severities)
-    
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_category != "All":
-        filtered_df = filtered_df[filtered_df["Category"] == selected_category]
-    if selected_severity != "All":
-        filtered_df = filtered_df[filtered_df["Severity"] == selected_severity]
-    
-    # Styled dataframe
-    st.dataframe(
-        filtered_df, 
-        use_container_width=True, 
-        hide_index=True,
-        height=400
-    )
-    
-    if len(filtered_df) < len(df):
-        st.markdown(f"""
-            <div style='text-align: center; color: #666; margin-top: 1rem;'>
-                Showing <strong>{len(filtered_df)}</strong> of <strong>{len(df)}</strong> results
+@st.fragment
+def _history_panel():
+    """Render analysis history; as a fragment, changing the filters reruns only this panel"""
+    if st.session_state["history"]["Category"]:
+        st.markdown("<br><br>", unsafe_allow_html=True)
+        st.markdown("""
+            <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                        padding: 1.5rem; 
+                        border-radius: 12px; 
+                        margin: 2rem 0 1rem 0;
+                        text-align: center;'>
+                <h2 style='color: white; margin: 0;'>📊 Analysis History</h2>
             </div>
         """, unsafe_allow_html=True)
+    
+        total_count = len(st.session_state["history"]["Category"])
+    
+        # Add filters in styled containers
+        categories, severities = _history_filter_options()
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_category = st.selectbox("🔍 Filter by Category", categories)
+        with col2:
+            selected_severity = st.selectbox("🔍 Filter by Severity", severities)
+    
+        # Apply filters
+        filtered_history = _filtered_history(selected_category, selected_severity)
+        filtered_count = len(filtered_history["Category"])
+    
+        # Only one page of rows is serialized and sent to the frontend
+        page_count = max(1, -(-filtered_count // HISTORY_PAGE_SIZE))
+        page = 1
+        if page_count > 1:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        start = (page - 1) * HISTORY_PAGE_SIZE
+        page_history = {
+            column: values[start:start + HISTORY_PAGE_SIZE]
+            for column, values in filtered_history.items()
+        }
+    
+        # Styled dataframe
+        st.dataframe(
+            page_history, 
+            use_container_width=True, 
+            hide_index=True,
+            column_order=HISTORY_COLUMNS
+        )
+    
+        if filtered_count < total_count:
+            st.markdown(f"""
+                <div style='text-align: center; color: #666; margin-top: 1rem;'>
+                    Showing <strong>{filtered_count}</strong> of <strong>{total_count}</strong> results
+                </div>
+            """, unsafe_allow_html=True)
+
+_history_panel()
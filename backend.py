@@ -1,5 +1,6 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
 from openai import OpenAI
 from pydantic import BaseModel
@@ -9,14 +10,65 @@ from chromadb.config import Settings
 import logging
 from datetime import datetime
 import hashlib
-from typing import Optional, List
-from collections import Counter
+import zlib
+import re
+import threading
+import queue
+from contextlib import asynccontextmanager
+import anyio
+import orjson
+from typing import Optional, List, Tuple
+from collections import Counter, OrderedDict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="CI/CD Debugger API", version="1.0.0")
+class GzipRequest(Request):
+    """Request whose body is gunzipped when it was sent with Content-Encoding: gzip"""
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                body = _gunzip(body)
+            self._body = body
+        return self._body
+
+    async def json(self):
+        # orjson parses a 100KB log body several times faster than json.loads;
+        # its JSONDecodeError subclasses json's, so FastAPI still answers 422
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class GzipRoute(APIRoute):
+    """Route that hands its endpoint a GzipRequest, so JSON bodies can arrive compressed"""
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def gzip_route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return gzip_route_handler
+
+# Endpoints are plain functions because their OpenAI and ChromaDB calls block;
+# FastAPI runs them on anyio's worker threads, sized here
+WORKER_THREADS = 100
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = WORKER_THREADS
+    yield
+    # Let queued knowledge-base writes finish before the process exits
+    await anyio.to_thread.run_sync(_write_queue.join)
+
+app = FastAPI(
+    title="CI/CD Debugger API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+app.router.route_class = GzipRoute
 
 # CORS middleware
 app.add_middleware(
@@ -50,6 +102,44 @@ collection = chroma_client.get_or_create_collection(
     metadata={"hnsw:space": "cosine"}
 )
 
+# Category/severity tallies for /stats, loaded once from the stored metadata
+# and kept current as failures are added, so /stats never scans the collection
+_stored_metadata = collection.get(include=["metadatas"]).get("metadatas") or []
+CATEGORY_COUNTS = Counter(m.get("category", "Unknown") for m in _stored_metadata)
+SEVERITY_COUNTS = Counter(m.get("severity", "Medium") for m in _stored_metadata)
+_counts_lock = threading.Lock()
+del _stored_metadata
+
+# New failures are saved by a background thread, so responses don't wait for
+# ChromaDB to persist them. Until a write lands, its metadata stays in
+# _pending_writes (by content hash) so the exact-match check still sees it.
+_write_queue = queue.Queue()
+_pending_writes = {}
+_pending_lock = threading.Lock()
+
+def _write_loop():
+    while True:
+        record = _write_queue.get()
+        content_hash = record["ids"][0]
+        try:
+            # ChromaDB ignores an id it already has, so only count real inserts
+            if collection.get(ids=[content_hash], include=[])["ids"]:
+                continue
+            collection.add(**record)
+            metadata = record["metadatas"][0]
+            with _counts_lock:
+                CATEGORY_COUNTS[metadata["category"]] += 1
+                SEVERITY_COUNTS[metadata["severity"]] += 1
+            logger.info(f"Saved new failure: {metadata['category']} ({metadata['severity']})")
+        except Exception as e:
+            logger.error(f"Failed to save failure {content_hash}: {e}", exc_info=True)
+        finally:
+            with _pending_lock:
+                _pending_writes.pop(content_hash, None)
+            _write_queue.task_done()
+
+threading.Thread(target=_write_loop, name="chroma-writer", daemon=True).start()
+
 
 # Failure Categories & Fixes (Rule Engine)
 failure_categories = {
@@ -60,6 +150,12 @@ failure_categories = {
     "Credential/Permissions": ["permission", "credential", "unauthorized", "access denied"],
 }
 
+# Lowercased once for case-insensitive matching against the lowercased log
+_category_keywords = {
+    category: tuple(word.lower() for word in keywords)
+    for category, keywords in failure_categories.items()
+}
+
 suggested_fixes = {
     "Test Failure": "Run tests locally: `mvn test` or `npm test` and fix failing assertions.",
     "Dependency Issue": "Check version numbers, run `npm install` or `mvn -U clean install`.",
@@ -68,6 +164,70 @@ suggested_fixes = {
     "Credential/Permissions": "Ensure Jenkins secrets / AWS IAM permissions are configured.",
 }
 
+# Maximum log size accepted for analysis (characters)
+MAX_CONTENT_SIZE = 100000
+# Largest raw upload that could still be within MAX_CONTENT_SIZE once decoded;
+# 4 bytes per character covers any UTF-8 log
+MAX_UPLOAD_BYTES = MAX_CONTENT_SIZE * 4
+
+# Cosine distance under which a stored failure's analysis is reused instead
+# of asking the LLM
+VECTOR_MATCH_DISTANCE = 0.25
+
+# Long logs are cut down to their error lines (plus context) before they are
+# embedded or sent to the LLM; no word boundaries, so AssertionError,
+# NullPointerException, FAILED and the like all count
+ERROR_LINE_RE = re.compile(r"error|fail|exception|traceback|fatal", re.IGNORECASE)
+DISTILL_CONTEXT_LINES = 3
+DISTILL_MAX_CHARS = 5000
+
+# Embedding model and in-process LRU of recent embeddings, keyed by the
+# SHA-256 of the embedded text
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_SIZE = 256
+_embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+def _embed(text: str, key: Optional[str] = None) -> List[float]:
+    """Embed text, reusing the vector if the same text was embedded recently; key is the text's SHA-256 if already known"""
+    return _embed_many([text], [key])[0]
+
+def _embed_many(texts: List[str], keys: Optional[List[Optional[str]]] = None) -> List[List[float]]:
+    """Embed several texts, sending every cache miss in one embeddings request"""
+    # Callers pass the digest they already have so a text isn't hashed twice
+    keys = [
+        key or hashlib.sha256(text.encode()).hexdigest()
+        for text, key in zip(texts, keys or [None] * len(texts))
+    ]
+    vectors = {}
+    with _embedding_cache_lock:
+        for key in keys:
+            vector = _embedding_cache.get(key)
+            if vector is not None:
+                _embedding_cache.move_to_end(key)
+                vectors[key] = vector
+    
+    # The embeddings API takes a list, so misses cost one round trip in total
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+    if missing:
+        embed = client.embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=list(missing.values())
+        )
+        missing_keys = list(missing)
+        with _embedding_cache_lock:
+            for item in embed.data:
+                key = missing_keys[item.index]
+                vectors[key] = item.embedding
+                _embedding_cache[key] = item.embedding
+                _embedding_cache.move_to_end(key)
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+    return [vectors[key] for key in keys]
+
 # Pydantic models
 class LogAnalysisRequest(BaseModel):
     content: str
@@ -77,11 +237,11 @@ class SearchRequest(BaseModel):
     limit: Optional[int] = 5
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """Health check endpoint"""
     try:
         count = collection.count()
-        return JSONResponse({
+        return ORJSONResponse({
             "status": "healthy",
             "database": "connected",
             "total_failures": count,
@@ -89,14 +249,14 @@ async def health_check():
         })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse({"status": "unhealthy", "error": str(e)}, status_code=503)
+        return ORJSONResponse({"status": "unhealthy", "error": str(e)}, status_code=503)
 
 @app.post("/test-upload")
-async def test_upload(file: UploadFile = File(...)):
+def test_upload(file: UploadFile = File(...)):
     """Test endpoint to debug file uploads"""
     try:
-        file_content = await file.read()
-        return JSONResponse({
+        file_content = file.file.read()
+        return ORJSONResponse({
             "filename": file.filename,
             "content_type": file.content_type,
             "size": len(file_content),
@@ -104,29 +264,26 @@ async def test_upload(file: UploadFile = File(...)):
         })
     except Exception as e:
         logger.error(f"Test upload error: {e}")
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 @app.get("/stats")
-async def get_statistics():
+def get_statistics():
     """Get statistics about stored failures"""
     try:
         count = collection.count()
         if count == 0:
-            return JSONResponse({
+            return ORJSONResponse({
                 "total_failures": 0,
                 "categories": {},
                 "severities": {},
                 "by_match_type": {}
             })
         
-        # Get all metadata
-        all_data = collection.get()
-        metadatas = all_data.get("metadatas", [])
+        with _counts_lock:
+            categories = CATEGORY_COUNTS.copy()
+            severities = SEVERITY_COUNTS.copy()
         
-        categories = Counter([m.get("category", "Unknown") for m in metadatas])
-        severities = Counter([m.get("severity", "Medium") for m in metadatas])
-        
-        return JSONResponse({
+        return ORJSONResponse({
             "total_failures": count,
             "categories": dict(categories),
             "severities": dict(severities),
@@ -137,7 +294,7 @@ async def get_statistics():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/analyze-text")
-async def analyze_text(request: LogAnalysisRequest):
+def analyze_text(request: LogAnalysisRequest):
     """Analyze log content from text input"""
     try:
         if not request.content:
@@ -147,11 +304,11 @@ async def analyze_text(request: LogAnalysisRequest):
         if not content:
             raise HTTPException(status_code=400, detail="Content cannot be empty (only whitespace)")
         
-        if len(content) > 100000:  # Limit to 100KB
+        if len(content) > MAX_CONTENT_SIZE:  # Limit to 100KB
             raise HTTPException(status_code=400, detail=f"Content too large ({len(content)} bytes, max 100KB)")
         
         logger.info(f"Processing text input, size: {len(content)} bytes")
-        return await _analyze_log_content(content)
+        return ORJSONResponse(_analyze_log_content(content))
     except HTTPException:
         raise
     except Exception as e:
@@ -159,49 +316,15 @@ async def analyze_text(request: LogAnalysisRequest):
         raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
 
 @app.post("/analyze-log")
-async def analyze_log(file: UploadFile = File(...)):
+def analyze_log(file: UploadFile = File(...)):
     """Analyze log from file upload"""
     try:
         # Check if file was provided (FastAPI will raise if File(...) is missing, but double-check)
         if file is None:
             raise HTTPException(status_code=400, detail="No file provided in request")
         
-        # Log file info for debugging
-        filename = file.filename or "unnamed_file"
-        content_type = file.content_type or "unknown"
-        logger.info(f"Received file upload: {filename}, content_type: {content_type}")
-        
-        # Read file content
-        file_content = await file.read()
-        
-        if not file_content or len(file_content) == 0:
-            raise HTTPException(status_code=400, detail="File is empty or could not be read (0 bytes)")
-        
-        # Try to decode with UTF-8, fallback to other encodings
-        try:
-            content = file_content.decode("utf-8")
-        except UnicodeDecodeError:
-            try:
-                content = file_content.decode("latin-1")
-                logger.warning(f"File decoded with latin-1 instead of utf-8: {file.filename or 'unnamed'}")
-            except UnicodeDecodeError:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="File encoding not supported. Please use UTF-8 or Latin-1 encoded text files."
-                )
-        
-        if not content or not content.strip():
-            raise HTTPException(status_code=400, detail="File is empty (no text content after decoding)")
-        
-        if len(content) > 100000:  # Limit to 100KB
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too large ({len(content)} bytes, max 100KB). Please use a smaller file."
-            )
-        
-        filename = file.filename or "unnamed_file"
-        logger.info(f"Processing file: {filename}, size: {len(content)} bytes, content_type: {file.content_type}")
-        return await _analyze_log_content(content)
+        content, content_hash = _read_log_upload(file)
+        return ORJSONResponse(_analyze_log_content(content, content_hash))
     except HTTPException:
         raise
     except UnicodeDecodeError as e:
@@ -211,20 +334,191 @@ async def analyze_log(file: UploadFile = File(...)):
         logger.error(f"Error reading file: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
-async def _analyze_log_content(content: str):
-    """Core analysis logic"""
+def _read_log_upload(file: UploadFile) -> Tuple[str, str]:
+    """Read, decompress and decode an uploaded log file, validating its size; returns (text, SHA-256 of its UTF-8)"""
+    # Log file info for debugging
+    filename = file.filename or "unnamed_file"
+    content_type = file.content_type or "unknown"
+    logger.info(f"Received file upload: {filename}, content_type: {content_type}")
+    
+    # Read file content, stopping one byte past the limit so an oversized
+    # upload is rejected without reading or decoding all of it
+    file_content = file.file.read(MAX_UPLOAD_BYTES + 1)
+    
+    if not file_content or len(file_content) == 0:
+        raise HTTPException(status_code=400, detail="File is empty or could not be read (0 bytes)")
+    
+    if len(file_content) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File too large (over {MAX_UPLOAD_BYTES} bytes; logs are limited to {MAX_CONTENT_SIZE:,} characters). Please use a smaller file."
+        )
+    
+    # The frontend gzips large logs before upload
+    if filename.endswith(".gz") or content_type == "application/gzip":
+        file_content = _gunzip(file_content)
+    
+    # Decode as UTF-8, falling back to latin-1, which accepts any byte
+    # sequence and maps one byte to one character
+    try:
+        content = file_content.decode("utf-8")
+        # The bytes already are the UTF-8 encoding, so hash them as they are
+        content_hash = hashlib.sha256(file_content).hexdigest()
+    except UnicodeDecodeError:
+        if len(file_content) > MAX_CONTENT_SIZE:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"File too large ({len(file_content)} bytes, max 100KB). Please use a smaller file."
+            )
+        content = file_content.decode("latin-1")
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        logger.warning(f"File decoded with latin-1 instead of utf-8: {filename}")
+    
+    if not content or not content.strip():
+        raise HTTPException(status_code=400, detail="File is empty (no text content after decoding)")
+    
+    if len(content) > MAX_CONTENT_SIZE:  # Limit to 100KB
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File too large ({len(content)} bytes, max 100KB). Please use a smaller file."
+        )
+    
+    logger.info(f"Processing file: {filename}, size: {len(content)} bytes, content_type: {file.content_type}")
+    return content, content_hash
+
+@app.post("/analyze-logs")
+def analyze_logs(files: List[UploadFile] = File(...)):
+    """Analyze several log files uploaded in a single request"""
+    if not client:
+        raise HTTPException(status_code=503, detail="OpenAI API key not configured")
+    
+    # Read every upload first so the batch's embeddings can go out together
+    uploads = []
+    for file in files:
+        try:
+            uploads.append(_read_log_upload(file))
+        except Exception as e:
+            uploads.append(e)
+    _prefetch_embeddings([u for u in uploads if isinstance(u, tuple)])
+    
+    results = []
+    for file, upload in zip(files, uploads):
+        filename = file.filename or "unnamed_file"
+        # A bad file is reported in its own result instead of failing the batch
+        try:
+            if isinstance(upload, Exception):
+                raise upload
+            result = _analyze_log_content(*upload)
+        except HTTPException as e:
+            result = {"error": e.detail, "status_code": e.status_code}
+        except Exception as e:
+            logger.error(f"Error processing file {filename}: {e}", exc_info=True)
+            result = {"error": f"Error processing file: {str(e)}", "status_code": 500}
+        results.append({"filename": filename, **result})
+    
+    return ORJSONResponse({"results": results, "count": len(results)})
+
+def _prefetch_embeddings(uploads: List[Tuple[str, str]]):
+    """Warm the embedding cache for logs that aren't exact matches, in one request"""
+    if not uploads:
+        return
+    try:
+        # The same log can be uploaded twice, and ChromaDB rejects duplicate ids
+        hashes = list(dict.fromkeys(h for _, h in uploads))
+        stored = set(collection.get(ids=hashes, include=[])["ids"])
+        with _pending_lock:
+            stored.update(h for _, h in uploads if h in _pending_writes)
+        summaries = [(_distill(c), c, h) for c, h in uploads if h not in stored]
+        _embed_many(
+            [summary for summary, _, _ in summaries],
+            # A log short enough to embed whole is its own summary
+            [h if summary is c else None for summary, c, h in summaries]
+        )
+    except Exception as e:
+        # Each file still embeds on its own if the batched request fails
+        logger.warning(f"Batched embedding failed: {e}")
+
+def _gunzip(data: bytes) -> bytes:
+    """Decompress a gzipped upload or request body, refusing anything that inflates past the size limit"""
+    # Bound the output so a small upload can't expand without limit
+    max_bytes = MAX_UPLOAD_BYTES
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        decompressed = decompressor.decompress(data, max_bytes)
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid gzip file: {str(e)}")
+    if decompressor.unconsumed_tail:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"File too large (over {max_bytes} bytes decompressed; logs are limited to {MAX_CONTENT_SIZE:,} characters). Please use a smaller file."
+        )
+    if not decompressor.eof:
+        raise HTTPException(status_code=400, detail="Invalid gzip file: truncated data")
+    return decompressed
+
+def _distill(content: str) -> str:
+    """Error lines of a long log with a few lines of context, the last DISTILL_MAX_CHARS of them.
+
+    Logs within the limit are returned unchanged. CI failures usually end up at
+    the tail, after any noise the pattern also matches (test names containing
+    "error", say), so the end is kept, and a long log with no error-like line
+    falls back to its tail as well.
+    """
+    if len(content) <= DISTILL_MAX_CHARS:
+        return content
+    
+    lines = content.splitlines()
+    keep = set()
+    for i, line in enumerate(lines):
+        if ERROR_LINE_RE.search(line):
+            keep.update(range(max(0, i - DISTILL_CONTEXT_LINES), i + DISTILL_CONTEXT_LINES + 1))
+    if not keep:
+        return content[-DISTILL_MAX_CHARS:]
+    
+    distilled = "\n".join(lines[i] for i in sorted(keep) if i < len(lines))
+    return distilled[-DISTILL_MAX_CHARS:]
+
+def _detect_category(content: str) -> str:
+    """Rule-based failure category: the first category with a keyword in the log"""
+    content_lower = content.lower()
+    for category, keywords in _category_keywords.items():
+        if any(word in content_lower for word in keywords):
+            return category
+    return "Unknown"
+
+def _llm_analysis(summary: str) -> str:
+    """Ask the LLM for a root cause, impact and fix for a distilled log"""
+    logger.info("Performing LLM analysis...")
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": "You are a CI/CD failure expert. Provide concise, actionable analysis."},
+            {"role": "user", "content": f"Analyze this CI/CD failure log and provide:\n1. Root cause\n2. Impact\n3. Step-by-step fix\n\nLog:\n\n{summary}"}  # At most 5000 chars for LLM
+        ],
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+def _analyze_log_content(content: str, content_hash: Optional[str] = None):
+    """Core analysis logic, returning the result as a dict; content_hash is the content's SHA-256 if already known"""
     if not client:
         raise HTTPException(status_code=503, detail="OpenAI API key not configured")
     
     try:
         # Generate unique ID using hash
-        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        if content_hash is None:
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
         
-        # Check if this exact log was already analyzed
-        existing = collection.get(ids=[content_hash])
-        if existing and existing.get("ids"):
-            stored_meta = existing["metadatas"][0]
-            return JSONResponse({
+        # Check if this exact log was already analyzed, including one that is
+        # still waiting to be written
+        with _pending_lock:
+            stored_meta = _pending_writes.get(content_hash)
+        if stored_meta is None:
+            existing = collection.get(ids=[content_hash])
+            if existing and existing.get("ids"):
+                stored_meta = existing["metadatas"][0]
+        if stored_meta is not None:
+            return {
                 "category": stored_meta["category"],
                 "severity": stored_meta["severity"],
                 "analysis": stored_meta["analysis"],
@@ -232,17 +526,18 @@ async def _analyze_log_content(content: str):
                 "match_type": "Exact match",
                 "similarity": 0.0,
                 "timestamp": stored_meta.get("timestamp", "Unknown")
-            })
+            }
+        
+        # Step 1: Rule-based category detection
+        detected = _detect_category(content)
         
-        # Step 1: Embed log
+        # Step 2: Embed the log's error lines; a full 100KB log would also be
+        # over the embedding model's input limit
         logger.info("Generating embeddings...")
-        embed = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=content
-        )
-        vector = embed.data[0].embedding
+        summary = _distill(content)
+        vector = _embed(summary, content_hash if summary is content else None)
 
-        # Step 2: Search for similar logs in vector DB
+        # Step 3: Search for similar logs in vector DB
         logger.info("Searching for similar failures...")
         results = collection.query(
             query_embeddings=[vector],
@@ -255,15 +550,20 @@ async def _analyze_log_content(content: str):
 
         has_results = docs and docs[0]
 
-        if has_results and distances[0][0] < 0.25:
-            similar_meta = metadatas[0][0]
-            return JSONResponse({
+        # Reuse a stored analysis only if the nearest failure is very close
+        match_index = None
+        if has_results and distances[0][0] < VECTOR_MATCH_DISTANCE:
+            match_index = 0
+
+        if match_index is not None:
+            similar_meta = metadatas[0][match_index]
+            return {
                 "category": similar_meta["category"],
                 "severity": similar_meta["severity"],
                 "analysis": similar_meta["analysis"],
                 "suggested_fix": similar_meta["suggested_fix"],
                 "match_type": "Vector match",
-                "similarity": float(distances[0][0]),
+                "similarity": float(distances[0][match_index]),
                 "similar_failures": [
                     {
                         "category": m.get("category"),
@@ -272,48 +572,33 @@ async def _analyze_log_content(content: str):
                     }
                     for m, d in zip(metadatas[0][:3], distances[0][:3])
                 ]
-            })
-
-        # Step 3: LLM new analysis
-        logger.info("Performing LLM analysis...")
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a CI/CD failure expert. Provide concise, actionable analysis."},
-                {"role": "user", "content": f"Analyze this CI/CD failure log and provide:\n1. Root cause\n2. Impact\n3. Step-by-step fix\n\nLog:\n\n{content[:5000]}"}  # Limit to 5000 chars for LLM
-            ],
-            temperature=0.3
-        )
-        explanation = response.choices[0].message.content
+            }
 
-        # Step 4: Rule-based category detection
-        detected = "Unknown"
-        for category, keywords in failure_categories.items():
-            if any(word.lower() in content.lower() for word in keywords):
-                detected = category
-                break
+        # Step 4: LLM new analysis
+        explanation = _llm_analysis(summary)
 
         severity = "High" if detected in ["Test Failure", "Dependency Issue"] else "Medium"
         fix = suggested_fixes.get(detected, "Investigate further manually.")
 
         # Step 5: Save knowledge with timestamp
         timestamp = datetime.now().isoformat()
-        collection.add(
-            documents=[content],
-            embeddings=[vector],
-            metadatas=[{
-                "category": detected,
-                "severity": severity,
-                "analysis": explanation,
-                "suggested_fix": fix,
-                "timestamp": timestamp
-            }],
-            ids=[content_hash]
-        )
-        
-        logger.info(f"Saved new failure: {detected} ({severity})")
+        metadata = {
+            "category": detected,
+            "severity": severity,
+            "analysis": explanation,
+            "suggested_fix": fix,
+            "timestamp": timestamp
+        }
+        with _pending_lock:
+            _pending_writes[content_hash] = metadata
+        _write_queue.put({
+            "documents": [content],
+            "embeddings": [vector],
+            "metadatas": [metadata],
+            "ids": [content_hash]
+        })
 
-        return JSONResponse({
+        return {
             "category": detected,
             "severity": severity,
             "analysis": explanation,
@@ -321,24 +606,20 @@ async def _analyze_log_content(content: str):
             "match_type": "LLM new analysis",
             "similarity": None,
             "timestamp": timestamp
-        })
+        }
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/search")
-async def search_failures(request: SearchRequest):
+def search_failures(request: SearchRequest):
     """Search for similar failures by text query"""
     if not client:
         raise HTTPException(status_code=503, detail="OpenAI API key not configured")
     
     try:
         # Embed the search query
-        embed = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=request.query
-        )
-        vector = embed.data[0].embedding
+        vector = _embed(request.query)
         
         # Search
         results = collection.query(
@@ -352,7 +633,7 @@ async def search_failures(request: SearchRequest):
         ids = results.get("ids", [[]])
         
         if not docs or not docs[0]:
-            return JSONResponse({"results": [], "count": 0})
+            return ORJSONResponse({"results": [], "count": 0})
         
         results_list = []
         for i, (doc, dist, meta, id_val) in enumerate(zip(docs[0], distances[0], metadatas[0], ids[0])):
@@ -365,7 +646,7 @@ async def search_failures(request: SearchRequest):
                 "preview": doc[:200] + "..." if len(doc) > 200 else doc
             })
         
-        return JSONResponse({
+        return ORJSONResponse({
             "results": results_list,
             "count": len(results_list),
             "query": request.query